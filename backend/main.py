@@ -1,17 +1,23 @@
-import json
+import asyncio
+import hashlib
 import logging
 import os
+import random
 import re
 import time
-from collections import defaultdict, deque
-from typing import Deque, Dict, List
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+import httpx
+import orjson
+from async_lru import alru_cache
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, field_validator
-
-import google.generativeai as genai
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 load_dotenv()
 
@@ -22,7 +28,12 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 if not GOOGLE_API_KEY:
     raise ValueError("GOOGLE_API_KEY is not set in the .env file")
 
-genai.configure(api_key=GOOGLE_API_KEY)
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+GEMINI_HEADERS = {"x-goog-api-key": GOOGLE_API_KEY, "content-type": "application/json"}
+# Caps concurrent Gemini calls per process to stay under RPM/TPM quotas.
+GEMINI_MAX_INFLIGHT = int(os.getenv("GEMINI_MAX_INFLIGHT", "20"))
+GEMINI_QUOTA_RETRIES = 3
+gemini_semaphore = asyncio.Semaphore(GEMINI_MAX_INFLIGHT)
 
 DEFAULT_MODELS = [
     "models/gemini-1.5-flash-latest",
@@ -33,21 +44,35 @@ DEFAULT_MODELS = [
     "gemini-1.5-pro-latest",
 ]
 ENV_MODELS = [item.strip() for item in os.getenv("GEMINI_MODEL", "").split(",") if item.strip()]
-def fetch_available_models() -> List[str]:
+
+
+# Failures raise instead of returning, so alru_cache never caches an empty list.
+@alru_cache(maxsize=1, ttl=600)
+async def _cached_models() -> List[str]:
+    response = await app.state.http.get(
+        f"{GEMINI_API_BASE}/models", headers=GEMINI_HEADERS, params={"pageSize": 1000}
+    )
+    response.raise_for_status()
+    return [
+        model["name"]
+        for model in orjson.loads(response.content).get("models", [])
+        if "generateContent" in model.get("supportedGenerationMethods", [])
+    ]
+
+
+async def fetch_available_models() -> List[str]:
     try:
-        models = [
-            model.name
-            for model in genai.list_models()
-            if "generateContent" in model.supported_generation_methods
-        ]
-        return models
+        return await _cached_models()
     except Exception as exc:
         logger.warning("Failed to fetch Gemini models: %s", exc)
         return []
 
 
-MODEL_CANDIDATES = ENV_MODELS or fetch_available_models() or DEFAULT_MODELS
+# Resolved from the Gemini model list at startup unless GEMINI_MODEL is set.
+MODEL_CANDIDATES = ENV_MODELS or DEFAULT_MODELS
 ACTIVE_MODEL_NAME = None
+# How many fallback candidates are raced concurrently when the active model fails.
+MODEL_RACE_WIDTH = 3
 
 app = FastAPI(title="Resume Reviewer API")
 
@@ -58,21 +83,58 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+
+# One pooled client for all Gemini REST calls so connections are reused.
+@app.on_event("startup")
+async def open_http_client() -> None:
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=30,
+    )
+
+
+@app.on_event("startup")
+async def load_model_candidates() -> None:
+    global MODEL_CANDIDATES
+    if not ENV_MODELS:
+        MODEL_CANDIDATES = await fetch_available_models() or DEFAULT_MODELS
+
+
+@app.on_event("shutdown")
+async def close_http_client() -> None:
+    await app.state.http.aclose()
+
 
-# Simple in-memory rate limiting by IP.
+# Simple in-memory token-bucket rate limiting by IP.
 RATE_LIMIT = 30
 RATE_WINDOW_SECONDS = 60
-request_log: Dict[str, Deque[float]] = defaultdict(deque)
+RATE_REFILL_PER_SECOND = RATE_LIMIT / RATE_WINDOW_SECONDS
+# Buckets are split into shards, each behind its own lock, so the
+# read-refill-write below stays atomic without one global lock.
+RATE_LIMIT_SHARDS = 16
+# Memory is bounded regardless of IP cardinality: idle clients expire once their
+# bucket would have refilled anyway, and full shards evict least recently used.
+RATE_LIMIT_MAX_CLIENTS = 50_000
+rate_buckets: List["TTLCache[str, Tuple[float, float]]"] = [
+    TTLCache(maxsize=RATE_LIMIT_MAX_CLIENTS // RATE_LIMIT_SHARDS, ttl=RATE_WINDOW_SECONDS * 4)
+    for _ in range(RATE_LIMIT_SHARDS)
+]
+rate_locks = [asyncio.Lock() for _ in range(RATE_LIMIT_SHARDS)]
 
 
-def enforce_rate_limit(client_ip: str) -> None:
-    now = time.time()
-    queue = request_log[client_ip]
-    while queue and now - queue[0] > RATE_WINDOW_SECONDS:
-        queue.popleft()
-    if len(queue) >= RATE_LIMIT:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded. Try again soon.")
-    queue.append(now)
+async def enforce_rate_limit(client_ip: str) -> None:
+    shard = hash(client_ip) & (RATE_LIMIT_SHARDS - 1)
+    async with rate_locks[shard]:
+        buckets = rate_buckets[shard]
+        now = time.monotonic()
+        tokens, last_refill = buckets.get(client_ip, (RATE_LIMIT, now))
+        tokens = min(RATE_LIMIT, tokens + (now - last_refill) * RATE_REFILL_PER_SECOND)
+        if tokens < 1:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded. Try again soon.")
+        buckets[client_ip] = (tokens - 1, now)
 
 
 class ReviewRequest(BaseModel):
@@ -103,6 +165,70 @@ class ReviewResponse(BaseModel):
     resume_outline: List[str] = []
 
 
+SECTION_KEYS = ("profile_summary", "experience", "projects", "skills", "education")
+
+# Gemini responseSchema (OpenAPI subset: no $ref or additionalProperties), so the
+# JSON shape of ReviewResponse is enforced at decode time.
+_STRING_LIST_SCHEMA = {"type": "ARRAY", "items": {"type": "STRING"}}
+_SECTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {field: _STRING_LIST_SCHEMA for field in SectionFeedback.model_fields},
+    "required": list(SectionFeedback.model_fields),
+}
+REVIEW_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "overview": {"type": "STRING"},
+        "match_level": {"type": "STRING"},
+        "sections": {
+            "type": "OBJECT",
+            "properties": {key: _SECTION_SCHEMA for key in SECTION_KEYS},
+            "required": list(SECTION_KEYS),
+        },
+        **{
+            field: _STRING_LIST_SCHEMA
+            for field in ("top_fixes", "jd_keywords", "insertion_guidance", "missing_info", "resume_outline")
+        },
+    },
+    "required": list(ReviewResponse.model_fields),
+}
+# Ask Gemini for schema-constrained JSON so extract_json is only needed as a fallback.
+GEMINI_GENERATION_CONFIG = {"responseMimeType": "application/json", "responseSchema": REVIEW_RESPONSE_SCHEMA}
+
+
+# Exact-match review cache, keyed by a hash of the whitespace-normalized inputs.
+# Reviews are stored pre-encoded so hits skip validation and serialization.
+RESPONSE_CACHE_TTL_SECONDS = 24 * 60 * 60
+RESPONSE_CACHE_MAX_ENTRIES = 1000
+response_cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+
+def review_cache_key(resume: str, job_description: str, role_title: str) -> str:
+    normalized = "\x1f".join(" ".join(part.split()) for part in (resume, job_description, role_title))
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def get_cached_review(key: str) -> Optional[bytes]:
+    entry = response_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, encoded = entry
+    if time.monotonic() - stored_at > RESPONSE_CACHE_TTL_SECONDS:
+        del response_cache[key]
+        return None
+    response_cache.move_to_end(key)
+    return encoded
+
+
+def store_cached_review(key: str, review: ReviewResponse) -> bytes:
+    encoded = review.model_dump_json().encode()
+    response_cache[key] = (time.monotonic(), encoded)
+    response_cache.move_to_end(key)
+    while len(response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+        response_cache.popitem(last=False)
+    return encoded
+
+
 @app.get("/health")
 async def health_check():
     return {
@@ -114,37 +240,73 @@ async def health_check():
 
 @app.get("/models")
 async def list_models():
-    return {"models": fetch_available_models() or MODEL_CANDIDATES}
+    return {"models": await fetch_available_models() or MODEL_CANDIDATES}
+
+
+_FENCE_OPEN = re.compile(r"^```(?:json)?\s*")
+_FENCE_CLOSE = re.compile(r"\s*```$")
+
+
+def _find_json_obj(text: str) -> Optional[str]:
+    # Single pass over the text returning the first balanced {...}, ignoring braces inside strings.
+    depth = 0
+    start = -1
+    in_string = False
+    escape = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            if depth:
+                in_string = True
+        elif char == "{":
+            if depth == 0:
+                start = index
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                return text[start : index + 1]
+    return None
 
 
 def extract_json(text: str) -> str:
     cleaned = text.strip()
     if cleaned.startswith("```"):
-        cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
-        cleaned = re.sub(r"\s*```$", "", cleaned)
-    match = re.search(r"\{.*\}", cleaned, flags=re.DOTALL)
-    if match:
-        return match.group(0)
-    return cleaned
+        cleaned = _FENCE_OPEN.sub("", cleaned)
+        cleaned = _FENCE_CLOSE.sub("", cleaned)
+    if cleaned[:1] == "{" and cleaned[-1:] == "}":
+        return cleaned
+    return _find_json_obj(cleaned) or cleaned
 
 
 def coerce_list(value: object) -> List[str]:
-    if isinstance(value, list):
-        return [str(item).strip() for item in value if str(item).strip()]
-    if isinstance(value, str):
+    # Exact type checks: model payloads only ever contain plain lists and strings.
+    if type(value) is list:
+        items = []
+        for item in value:
+            text = (item if type(item) is str else str(item)).strip()
+            if text:
+                items.append(text)
+        return items
+    if type(value) is str:
         return [line.strip("- ").strip() for line in value.splitlines() if line.strip()]
     return []
 
 
-def normalize_section(payload: dict, key: str) -> SectionFeedback:
-    section = payload.get("sections", {}).get(key, {}) if isinstance(payload.get("sections"), dict) else {}
+def normalize_section(section: object) -> SectionFeedback:
     if not isinstance(section, dict):
         section = {}
     return SectionFeedback(
-        strengths=coerce_list(section.get("strengths", [])),
-        weaknesses=coerce_list(section.get("weaknesses", [])),
-        rewrites=coerce_list(section.get("rewrites", [])),
-        keywords=coerce_list(section.get("keywords", [])),
+        strengths=coerce_list(section.get("strengths")),
+        weaknesses=coerce_list(section.get("weaknesses")),
+        rewrites=coerce_list(section.get("rewrites")),
+        keywords=coerce_list(section.get("keywords")),
     )
 
 
@@ -153,13 +315,10 @@ def normalize_response(payload: dict, require_content: bool = True) -> ReviewRes
     match_level = str(payload.get("match_level", "")).strip()
     top_fixes = coerce_list(payload.get("top_fixes", []))
 
-    sections = {
-        "profile_summary": normalize_section(payload, "profile_summary"),
-        "experience": normalize_section(payload, "experience"),
-        "projects": normalize_section(payload, "projects"),
-        "skills": normalize_section(payload, "skills"),
-        "education": normalize_section(payload, "education"),
-    }
+    raw_sections = payload.get("sections")
+    if not isinstance(raw_sections, dict):
+        raw_sections = {}
+    sections = {key: normalize_section(raw_sections.get(key)) for key in SECTION_KEYS}
 
     jd_keywords = coerce_list(payload.get("jd_keywords", []))
     insertion_guidance = coerce_list(payload.get("insertion_guidance", []))
@@ -181,61 +340,254 @@ def normalize_response(payload: dict, require_content: bool = True) -> ReviewRes
     )
 
 
-async def call_gemini_with_retry(prompt: str, retries: int = 2, require_content: bool = True) -> ReviewResponse:
-    global ACTIVE_MODEL_NAME
-    last_error: Exception | None = None
-    for attempt in range(retries + 1):
-        for model_name in MODEL_CANDIDATES:
-            try:
-                response = genai.GenerativeModel(model_name).generate_content(prompt)
-                raw_text = response.text or ""
-                extracted = extract_json(raw_text)
-                payload = json.loads(extracted)
-                ACTIVE_MODEL_NAME = model_name
-                return normalize_response(payload, require_content=require_content)
-            except Exception as exc:
-                last_error = exc
-                message = str(exc)
-                if "not found" in message or "not supported" in message:
-                    logger.warning("Gemini model unavailable: %s", message)
-                    continue
-                logger.warning("Gemini parsing failed (%s/%s): %s", attempt + 1, retries + 1, exc)
-        if attempt == retries:
-            detail = (
-                "No available Gemini model found. "
-                "Set GEMINI_MODEL in the .env file."
-                if last_error and ("not found" in str(last_error) or "not supported" in str(last_error))
-                else "AI response could not be parsed. Please try again."
-            )
-            raise HTTPException(status_code=500, detail=detail)
-        prompt += (
-            "\n\nReturn ONLY valid JSON with keys overview, match_level, sections, top_fixes, "
-            "jd_keywords, insertion_guidance, missing_info, resume_outline. "
-            "Do not wrap in code fences."
-        )
+def model_path(model_name: str) -> str:
+    return model_name if model_name.startswith("models/") else f"models/{model_name}"
 
 
-@app.post("/review", response_model=ReviewResponse)
-async def review_resume(data: ReviewRequest, request: Request):
-    client_ip = request.client.host if request.client else "unknown"
-    enforce_rate_limit(client_ip)
+# Static instruction blocks go in systemInstruction, separate from the per-request
+# prompt. (They are far below the minimum token count for Gemini context caching.)
+def build_request_body(system_instruction: str, prompt: str) -> bytes:
+    return orjson.dumps(
+        {
+            "systemInstruction": {"parts": [{"text": system_instruction}]},
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": GEMINI_GENERATION_CONFIG,
+        }
+    )
 
-    resume_text = data.resume.strip()
-    job_description = data.job_description.strip()
-    role_title = data.role_title.strip()
 
-    if not resume_text and not role_title:
-        raise HTTPException(status_code=400, detail="Provide a resume or a target role title.")
+def is_rate_limited(response: httpx.Response) -> bool:
+    return response.status_code == 429 or (response.is_error and "RESOURCE_EXHAUSTED" in response.text)
 
-    if not resume_text:
-        prompt = f"""
+
+class GeminiQuotaError(Exception):
+    pass
+
+
+async def post_generate(url: str, body: bytes) -> httpx.Response:
+    # Quota errors back off exponentially with jitter, outside the semaphore. Once
+    # retries run out the error propagates as-is: other models share the same quota.
+    for attempt in range(GEMINI_QUOTA_RETRIES + 1):
+        async with gemini_semaphore:
+            response = await app.state.http.post(url, headers=GEMINI_HEADERS, content=body)
+        if not is_rate_limited(response):
+            return response
+        if attempt < GEMINI_QUOTA_RETRIES:
+            delay = min(30, 2**attempt + random.random())
+            logger.warning("Gemini quota exceeded, retrying in %.1fs", delay)
+            await asyncio.sleep(delay)
+    raise GeminiQuotaError(f"Gemini quota exceeded ({response.status_code})")
+
+
+async def generate_content(model_name: str, system_instruction: str, prompt: str) -> str:
+    response = await post_generate(
+        f"{GEMINI_API_BASE}/{model_path(model_name)}:generateContent",
+        build_request_body(system_instruction, prompt),
+    )
+    if response.is_error:
+        raise RuntimeError(f"Gemini request failed ({response.status_code}): {response.text}")
+    candidates = orjson.loads(response.content).get("candidates") or []
+    if not candidates:
+        raise ValueError("Gemini returned no candidates")
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts)
+
+
+async def stream_content(model_name: str, system_instruction: str, prompt: str) -> AsyncIterator[str]:
+    # The upstream stream is drained into a queue while holding the semaphore and
+    # yielded from outside it, so a slow SSE client never pins a Gemini slot.
+    body = build_request_body(system_instruction, prompt)
+    queue: "asyncio.Queue[str | Exception | None]" = asyncio.Queue()
+
+    async def pump() -> None:
+        try:
+            async with gemini_semaphore, app.state.http.stream(
+                "POST",
+                f"{GEMINI_API_BASE}/{model_path(model_name)}:streamGenerateContent",
+                params={"alt": "sse"},
+                headers=GEMINI_HEADERS,
+                content=body,
+            ) as response:
+                if response.is_error:
+                    text = (await response.aread()).decode(errors="replace")
+                    raise RuntimeError(f"Gemini request failed ({response.status_code}): {text}")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    candidates = orjson.loads(line[5:]).get("candidates") or []
+                    if candidates:
+                        parts = candidates[0].get("content", {}).get("parts", [])
+                        queue.put_nowait("".join(part.get("text", "") for part in parts))
+            queue.put_nowait(None)
+        except Exception as exc:
+            queue.put_nowait(exc)
+
+    pump_task = asyncio.create_task(pump())
+    try:
+        while (item := await queue.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        pump_task.cancel()
+
+
+def parse_payload(raw_text: str) -> dict:
+    try:
+        return orjson.loads(raw_text)
+    except orjson.JSONDecodeError:
+        return orjson.loads(extract_json(raw_text))
+
+
+def clean_strings(items: List[str]) -> List[str]:
+    # coerce_list for values already validated as List[str].
+    return [text for text in (item.strip() for item in items) if text]
+
+
+def clean_section(section: SectionFeedback) -> SectionFeedback:
+    return SectionFeedback(
+        strengths=clean_strings(section.strengths),
+        weaknesses=clean_strings(section.weaknesses),
+        rewrites=clean_strings(section.rewrites),
+        keywords=clean_strings(section.keywords),
+    )
+
+
+def parse_review(raw_text: str, require_content: bool = True) -> ReviewResponse:
+    # Schema-constrained output validates straight from JSON in pydantic-core;
+    # anything off-schema goes through the lenient normalize_response path.
+    try:
+        review = ReviewResponse.model_validate_json(raw_text)
+    except ValidationError:
+        return normalize_response(parse_payload(raw_text), require_content=require_content)
+    if review.sections.keys() != set(SECTION_KEYS):
+        return normalize_response(review.model_dump(), require_content=require_content)
+
+    # Same cleanup as normalize_response, so both paths produce identical output.
+    overview = review.overview.strip()
+    match_level = review.match_level.strip()
+    top_fixes = clean_strings(review.top_fixes)
+    if require_content and (not overview or not match_level or not top_fixes):
+        raise ValueError("Missing required fields in model output")
+
+    return ReviewResponse(
+        overview=overview,
+        match_level=match_level,
+        sections={key: clean_section(review.sections[key]) for key in SECTION_KEYS},
+        top_fixes=top_fixes[:5],
+        jd_keywords=clean_strings(review.jd_keywords),
+        insertion_guidance=clean_strings(review.insertion_guidance),
+        missing_info=clean_strings(review.missing_info),
+        resume_outline=clean_strings(review.resume_outline),
+    )
+
+
+def is_model_unavailable(exc: Exception) -> bool:
+    message = str(exc)
+    return "not found" in message or "not supported" in message
+
+
+async def try_model(model_name: str, system_instruction: str, prompt: str, require_content: bool) -> ReviewResponse:
+    try:
+        raw_text = await generate_content(model_name, system_instruction, prompt)
+        review = parse_review(raw_text, require_content=require_content)
+    except Exception as exc:
+        if is_model_unavailable(exc):
+            logger.warning("Gemini model unavailable: %s", exc)
+        else:
+            logger.warning("Gemini parsing failed (%s): %s", model_name, exc)
+        raise
+    return review
+
+
+async def race_models(
+    model_names: List[str], system_instruction: str, prompt: str, require_content: bool
+) -> ReviewResponse:
+    # First successful candidate wins and becomes the active model; the rest are cancelled.
+    global ACTIVE_MODEL_NAME
+    tasks = {
+        asyncio.create_task(try_model(name, system_instruction, prompt, require_content)): name
+        for name in model_names
+    }
+    pending = set(tasks)
+    last_error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    ACTIVE_MODEL_NAME = tasks[task]
+                    return task.result()
+                if isinstance(task.exception(), GeminiQuotaError):
+                    raise task.exception()
+                last_error = task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+    raise last_error or RuntimeError("No Gemini model candidates")
+
+
+# Only relevant for models that ignore responseSchema and reply with prose or fences.
+REPROMPT_SUFFIX = (
+    "\n\nReturn ONLY valid JSON with keys overview, match_level, sections, top_fixes, "
+    "jd_keywords, insertion_guidance, missing_info, resume_outline. "
+    "Do not wrap in code fences."
+)
+
+
+async def call_gemini_with_retry(
+    system_instruction: str, prompt: str, retries: int = 2, require_content: bool = True
+) -> ReviewResponse:
+    global ACTIVE_MODEL_NAME
+    last_error: BaseException | None = None
+    # Quota exhaustion is already retried with backoff in post_generate, so it is
+    # surfaced right away instead of being retried or fanned out to other models.
+    try:
+        for attempt in range(retries + 1):
+            # Read once: a concurrent race winner may change the global across awaits.
+            # On a cold process the first configured candidate is tried alone before racing.
+            active = ACTIVE_MODEL_NAME or (MODEL_CANDIDATES[0] if MODEL_CANDIDATES else None)
+            candidates = [name for name in MODEL_CANDIDATES if name != active]
+            if active:
+                try:
+                    review = await try_model(active, system_instruction, prompt, require_content)
+                except GeminiQuotaError:
+                    raise
+                except Exception as exc:
+                    last_error = exc
+                else:
+                    ACTIVE_MODEL_NAME = active
+                    return review
+            for start in range(0, len(candidates), MODEL_RACE_WIDTH):
+                try:
+                    batch = candidates[start : start + MODEL_RACE_WIDTH]
+                    return await race_models(batch, system_instruction, prompt, require_content)
+                except GeminiQuotaError:
+                    raise
+                except Exception as exc:
+                    last_error = exc
+            logger.warning("Gemini attempt %s/%s failed", attempt + 1, retries + 1)
+            if attempt == retries:
+                detail = (
+                    "No available Gemini model found. "
+                    "Set GEMINI_MODEL in the .env file."
+                    if last_error and is_model_unavailable(last_error)
+                    else "AI response could not be parsed. Please try again."
+                )
+                raise HTTPException(status_code=500, detail=detail)
+            # Append the reminder once; repeating it only grows the prompt on each retry.
+            if attempt == 0:
+                prompt += REPROMPT_SUFFIX
+    except GeminiQuotaError as exc:
+        logger.warning("%s", exc)
+        raise HTTPException(status_code=503, detail="AI service is over its usage quota. Please try again shortly.")
+
+
+OUTLINE_INSTRUCTIONS = """
 You are an expert Resume Reviewer for software and tech roles.
 The user has only provided a role title and no resume.
 Provide a concise outline they can fill in and request missing info.
 
-Role Title: {role_title}
-Job Description: {job_description or "Not provided"}
-
 Return JSON ONLY with keys:
 overview: 1-2 sentences explaining you need a resume to review.
 match_level: Low
@@ -246,9 +598,8 @@ insertion_guidance: where to place those keywords if a resume were provided.
 missing_info: list of details you need from the user.
 resume_outline: bullet outline for a tech resume they can fill in.
 """
-        return await call_gemini_with_retry(prompt, require_content=False)
 
-    prompt = f"""
+REVIEW_INSTRUCTIONS = """
 You are an expert Resume Reviewer for software and tech roles.
 Analyze the resume (and job description if provided) and give clear, practical, prioritized feedback.
 
@@ -265,10 +616,6 @@ Instructions:
 - If resume is short/junior, suggest projects/coursework to add.
 - If JD provided: list top 5-10 skills/keywords and show how to insert them.
 
-Role Title: {role_title or "Not provided"}
-Job Description: {job_description or "Not provided"}
-Resume: {resume_text}
-
 Return JSON ONLY with keys:
 overview: brief overview (2-3 sentences).
 match_level: Low/Medium/High.
@@ -281,7 +628,130 @@ missing_info: details to request if resume lacks specifics.
 resume_outline: empty array unless resume is missing.
 """
 
-    return await call_gemini_with_retry(prompt)
+
+OUTLINE_PROMPT = """
+Role Title: {role_title}
+Job Description: {job_description}
+"""
+
+REVIEW_PROMPT = """
+Role Title: {role_title}
+Job Description: {job_description}
+Resume: {resume_text}
+"""
+
+
+def build_prompt(resume_text: str, job_description: str, role_title: str) -> Tuple[str, str]:
+    if not resume_text:
+        return OUTLINE_INSTRUCTIONS, OUTLINE_PROMPT.format(
+            role_title=role_title,
+            job_description=job_description or "Not provided",
+        )
+
+    return REVIEW_INSTRUCTIONS, REVIEW_PROMPT.format(
+        role_title=role_title or "Not provided",
+        job_description=job_description or "Not provided",
+        resume_text=resume_text,
+    )
+
+
+# Resumes shorter than this cannot be reviewed meaningfully; answer with a canned
+# request for more detail instead of calling Gemini.
+MIN_RESUME_LENGTH = 50
+SHORT_RESUME_RESPONSE = ReviewResponse(
+    overview="The resume is too short to review. Paste the full resume text to get feedback.",
+    match_level="Low",
+    sections={
+        key: SectionFeedback(strengths=[], weaknesses=[], rewrites=[], keywords=[]) for key in SECTION_KEYS
+    },
+    top_fixes=[
+        "Paste the complete resume text, not just a headline or a few words.",
+        "Include work experience with roles, dates, and measurable results.",
+        "List technical skills, projects, and education.",
+    ],
+    missing_info=["Work experience", "Projects", "Skills", "Education"],
+)
+SHORT_RESUME_JSON = SHORT_RESUME_RESPONSE.model_dump_json().encode()
+
+
+def is_too_short(resume_text: str) -> bool:
+    return 0 < len(resume_text) < MIN_RESUME_LENGTH
+
+
+async def prepare_review(data: ReviewRequest, request: Request) -> Tuple[str, str, str]:
+    resume_text = data.resume.strip()
+    job_description = data.job_description.strip()
+    role_title = data.role_title.strip()
+
+    # Reject empty requests before they consume a rate-limit token.
+    if not resume_text and not role_title:
+        raise HTTPException(status_code=400, detail="Provide a resume or a target role title.")
+
+    client_ip = request.client.host if request.client else "unknown"
+    await enforce_rate_limit(client_ip)
+    return resume_text, job_description, role_title
+
+
+@app.post("/review", response_model=ReviewResponse)
+async def review_resume(data: ReviewRequest, request: Request):
+    resume_text, job_description, role_title = await prepare_review(data, request)
+    if is_too_short(resume_text):
+        return Response(content=SHORT_RESUME_JSON, media_type="application/json")
+
+    cache_key = review_cache_key(resume_text, job_description, role_title)
+    cached = get_cached_review(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    system_instruction, prompt = build_prompt(resume_text, job_description, role_title)
+    review = await call_gemini_with_retry(system_instruction, prompt, require_content=bool(resume_text))
+    return Response(content=store_cached_review(cache_key, review), media_type="application/json")
+
+
+def sse_event(event: str, data: bytes) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+@app.post("/review/stream")
+async def review_resume_stream(data: ReviewRequest, request: Request):
+    # Server-sent events:
+    # - "chunk": {"text": ...} raw model text as it arrives; append to a buffer.
+    # - "reset": {} the streamed text is abandoned (stream or parse failure) and a
+    #   non-streaming retry follows; clear the buffer.
+    # - "review": the normalized ReviewResponse; always the last frame on success.
+    # - "error": {"detail": ...} no review could be produced; the last frame.
+    resume_text, job_description, role_title = await prepare_review(data, request)
+    cache_key = review_cache_key(resume_text, job_description, role_title)
+    require_content = bool(resume_text)
+
+    async def events():
+        if is_too_short(resume_text):
+            yield sse_event("review", SHORT_RESUME_JSON)
+            return
+        cached = get_cached_review(cache_key)
+        if cached is not None:
+            yield sse_event("review", cached)
+            return
+
+        system_instruction, prompt = build_prompt(resume_text, job_description, role_title)
+        chunks: List[str] = []
+        try:
+            async for text in stream_content(ACTIVE_MODEL_NAME or MODEL_CANDIDATES[0], system_instruction, prompt):
+                chunks.append(text)
+                yield sse_event("chunk", orjson.dumps({"text": text}))
+            review = parse_review("".join(chunks), require_content=require_content)
+        except Exception as exc:
+            logger.warning("Gemini stream failed, falling back: %s", exc)
+            if chunks:
+                yield sse_event("reset", b"{}")
+            try:
+                review = await call_gemini_with_retry(system_instruction, prompt, require_content=require_content)
+            except HTTPException as http_exc:
+                yield sse_event("error", orjson.dumps({"detail": http_exc.detail}))
+                return
+        yield sse_event("review", store_cached_review(cache_key, review))
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 @app.post("/tailor", response_model=ReviewResponse)
@@ -292,4 +762,11 @@ async def tailor_alias(data: ReviewRequest, request: Request):
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Rate limits, caches and the Gemini semaphore are per worker process.
+    uvicorn.run(
+        "main:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )